@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Static Asset Precompression for TEQST
+Writes .gz and .br siblings next to the Ionic build output and Django's
+collectstatic files so nginx can serve them with gzip_static/brotli_static,
+emits a manifest of original and compressed sizes and reports the
+transfer-size reduction.
+
+Usage:
+    python3 compress_static.py /opt/teqst/TEQST_Frontend/www /var/www/teqst/static
+    python3 compress_static.py --check-url http://116.202.96.11/ /opt/teqst/TEQST_Frontend/www
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+
+from deployment_tests import print_error, print_status, print_success, print_warning
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.js', '.mjs', '.css', '.html', '.json', '.map', '.svg', '.txt', '.xml', '.ico',
+                           '.ttf', '.eot', '.webmanifest'}
+
+# Below this size the compressed file saves less than a TCP packet
+MIN_SIZE = 1024
+
+
+def compress_file(path, formats):
+    """Write compressed siblings of path if missing or stale and return their sizes"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    source_mtime = os.path.getmtime(path)
+    sizes = {}
+
+    for suffix in formats:
+        target = path + suffix
+        if not os.path.exists(target) or os.path.getmtime(target) < source_mtime:
+            if suffix == '.gz':
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            else:
+                compressed = brotli.compress(data, quality=11)
+            # Only keep variants that are actually smaller
+            if len(compressed) >= len(data):
+                if os.path.exists(target):
+                    os.remove(target)
+                continue
+            with open(target, 'wb') as f:
+                f.write(compressed)
+        sizes[suffix.lstrip('.')] = os.path.getsize(target)
+    return len(data), sizes
+
+
+def compress_tree(root, formats):
+    """Precompress every compressible file under root"""
+    manifest = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(dirpath, name)
+            if os.path.getsize(path) < MIN_SIZE:
+                continue
+            size, sizes = compress_file(path, formats)
+            manifest[os.path.relpath(path, root)] = dict(size=size, **sizes)
+    return manifest
+
+
+def report_reduction(label, manifest):
+    """Print the transfer-size reduction for one tree and return (original, transferred)"""
+    original = sum(entry['size'] for entry in manifest.values())
+    gzip_total = sum(entry.get('gz', entry['size']) for entry in manifest.values())
+    best_total = sum(min(entry.get('gz', entry['size']), entry.get('br', entry['size']))
+                     for entry in manifest.values())
+    if original:
+        print_success(f"{label}: {len(manifest)} files, {original / 1024:.0f} KB -> "
+                      f"gzip {gzip_total / 1024:.0f} KB ({100 * (1 - gzip_total / original):.1f}% smaller), "
+                      f"best {best_total / 1024:.0f} KB ({100 * (1 - best_total / original):.1f}% smaller)")
+    return original, best_total
+
+
+def check_url(base_url, manifest):
+    """Measure bytes on the wire for the manifest files as served by nginx
+
+    Returns None if the server cannot be reached.
+    """
+    import requests
+
+    plain = wire = 0
+    for relpath in manifest:
+        url = base_url.rstrip('/') + '/' + relpath.replace(os.sep, '/')
+        try:
+            response = requests.get(url, headers={'Accept-Encoding': 'br, gzip'}, stream=True, timeout=10)
+            if response.status_code != 200:
+                print_warning(f"{url} returned {response.status_code}")
+                continue
+            wire += len(response.raw.read(decode_content=False))
+        except requests.exceptions.RequestException as e:
+            print_error(f"Failed to fetch {url}: {e}")
+            return None
+        plain += manifest[relpath]['size']
+    if plain:
+        print_success(f"Served by {base_url}: {plain / 1024:.0f} KB -> {wire / 1024:.0f} KB on the wire "
+                      f"({100 * (1 - wire / plain):.1f}% smaller)")
+    return plain, wire
+
+
+def run_check(base_url, manifest_path, roots):
+    """Measure served transfer sizes for the given roots from an existing manifest"""
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print_error(f"Cannot read manifest {manifest_path}: {e}")
+        return 1
+
+    for root in roots:
+        if root not in manifest:
+            print_error(f"{root} is not in {manifest_path}; run the compression step first")
+            return 1
+        measured = check_url(base_url, manifest[root])
+        if measured is None:
+            return 1
+        plain, wire = measured
+        if plain and wire >= plain:
+            print_error("nginx is not serving compressed variants")
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompress static assets for nginx")
+    parser.add_argument('roots', nargs='+', help="Directories to precompress (or to check with --check-url)")
+    parser.add_argument('--manifest', default='static_manifest.json',
+                        help="Size manifest to write (keep it outside the served directories)")
+    parser.add_argument('--check-url', help="Only measure transfer sizes as served from this URL, reading the "
+                                            "existing manifest without compressing or rewriting it")
+    args = parser.parse_args()
+
+    if args.check_url:
+        return run_check(args.check_url, args.manifest, args.roots)
+
+    formats = ['.gz']
+    if brotli is not None:
+        formats.append('.br')
+    else:
+        print_warning("brotli module not installed, writing gzip variants only (pip install brotli)")
+
+    manifest = {}
+    for root in args.roots:
+        if not os.path.isdir(root):
+            print_error(f"Directory not found: {root}")
+            return 1
+        print_status(f"Precompressing {root}...")
+        manifest[root] = compress_tree(root, formats)
+        report_reduction(root, manifest[root])
+
+    with open(args.manifest, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print_status(f"Manifest written to {args.manifest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -40,6 +40,21 @@ FRONTEND_DIR="$PROJECT_DIR/TEQST_Frontend"
 NGINX_SITE="teqst"
 SERVICE_NAME="teqst-backend"
 
+# Backend process model (see gunicorn.conf.py)
+BACKEND_WORKERS="${BACKEND_WORKERS:-4}"
+BACKEND_THREADS="${BACKEND_THREADS:-4}"
+BACKEND_MAX_REQUESTS="${BACKEND_MAX_REQUESTS:-1000}"
+
+# PostgreSQL connection handling: "persistent" keeps one connection per
+# worker thread open, "pool" uses Django's psycopg pool (Django 5.1+)
+DB_CONN_MODE="${DB_CONN_MODE:-persistent}"
+DB_CONN_MAX_AGE="${DB_CONN_MAX_AGE:-600}"
+DB_POOL_MAX_SIZE="${DB_POOL_MAX_SIZE:-$BACKEND_THREADS}"
+
+# Subdirectory of MEDIA_ROOT holding sentence recordings (must match the
+# SentenceRecording upload_to); it is only reachable via X-Accel-Redirect
+RECORDINGS_MEDIA_DIR="${RECORDINGS_MEDIA_DIR:-recordings}"
+
 # Check if running as root
 # if [[ $EUID -eq 0 ]]; then
 #    print_error "This script should not be run as root"
@@ -75,6 +90,52 @@ check_prerequisites() {
     echo ""
 }
 
+# Configure PostgreSQL connection reuse in localsettings.py
+configure_db_connections() {
+    if grep -q "Database connection handling" localsettings.py; then
+        print_warning "Database connection handling already configured"
+        return
+    fi
+    
+    local conn_mode="$DB_CONN_MODE"
+    
+    # Django only understands OPTIONS['pool'] from 5.1 on; older versions
+    # would hand it to psycopg as a connection option and fail every request
+    if [ "$conn_mode" = "pool" ] && ! python -c "import django, sys; sys.exit(django.VERSION < (5, 1))"; then
+        print_warning "Connection pooling needs Django 5.1+, using persistent connections"
+        conn_mode="persistent"
+    fi
+    
+    print_status "Configuring database connections ($conn_mode)..."
+    
+    if [ "$conn_mode" = "pool" ]; then
+        pip install "psycopg[binary,pool]"
+        cat >> localsettings.py <<EOF
+
+# Database connection handling (added by deploy.sh)
+# One psycopg pool per gunicorn worker, sized to its thread count
+if DATABASES['default']['ENGINE'] in ('django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2'):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': 1,
+        'max_size': $DB_POOL_MAX_SIZE,
+        'timeout': 10,
+    }
+EOF
+    else
+        cat >> localsettings.py <<EOF
+
+# Database connection handling (added by deploy.sh)
+# Keep connections open between requests and check them before reuse
+if DATABASES['default']['ENGINE'] in ('django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2'):
+    DATABASES['default']['CONN_MAX_AGE'] = $DB_CONN_MAX_AGE
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+EOF
+    fi
+    
+    print_success "Database connections configured"
+}
+
 # Setup backend
 setup_backend() {
     print_status "Setting up backend..."
@@ -97,6 +158,11 @@ setup_backend() {
     pip install -r requirements.txt
     print_success "Dependencies installed"
     
+    # Install the production application server
+    print_status "Installing gunicorn..."
+    pip install gunicorn
+    print_success "gunicorn installed"
+    
     # Navigate to Django project
     cd TEQST
     
@@ -122,6 +188,9 @@ setup_backend() {
         print_warning "Local settings file already exists"
     fi
     
+    # Reuse database connections across requests
+    configure_db_connections
+    
     # Run migrations
     print_status "Running database migrations..."
     python manage.py makemigrations usermgmt textmgmt recordingmgmt
@@ -174,24 +243,74 @@ setup_frontend() {
     echo ""
 }
 
+# Precompress static assets
+compress_static_assets() {
+    print_status "Precompressing static assets..."
+    
+    "$BACKEND_DIR/venv/bin/pip" install brotli requests
+    "$BACKEND_DIR/venv/bin/python" "$PROJECT_DIR/compress_static.py" \
+        --manifest "$PROJECT_DIR/static_manifest.json" \
+        "$FRONTEND_DIR/www" /var/www/teqst/static
+    print_success "Static assets precompressed"
+    
+    echo ""
+}
+
 # Setup nginx
 setup_nginx() {
     print_status "Setting up nginx..."
     
+    # brotli_static needs the ngx_brotli module (libnginx-mod-http-brotli-static)
+    BROTLI_STATIC=""
+    if ls /etc/nginx/modules-enabled/ 2>/dev/null | grep -q brotli; then
+        BROTLI_STATIC="brotli_static on;"
+    fi
+    
     # Create nginx configuration
     sudo tee /etc/nginx/sites-available/$NGINX_SITE > /dev/null <<EOF
+# Per-request timing for latency_report.py
+log_format teqst_timing '\$remote_addr [\$time_local] "\$request" \$status \$body_bytes_sent '
+                        'rt=\$request_time urt=\$upstream_response_time';
+
 server {
     listen 80;
     server_name 116.202.96.11;
 
+    # Serve the .gz/.br siblings written by compress_static.py
+    gzip_static on;
+    $BROTLI_STATIC
+
     # Frontend
     location / {
         root $FRONTEND_DIR/www;
         try_files \$uri \$uri/ /index.html;
     }
 
+    # The app shell must always be revalidated so new bundle hashes are picked up
+    location = /index.html {
+        root $FRONTEND_DIR/www;
+        add_header Cache-Control "no-cache";
+    }
+
+    # Fingerprinted Angular bundles never change under the same name
+    location ~* "\.[0-9a-f]{16,20}\.(js|css|woff2?|ttf|svg|png|jpg)\$" {
+        root $FRONTEND_DIR/www;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
     # Backend API
     location /api/ {
+        # Spool recording uploads to disk in nginx before proxying, so a slow
+        # mobile upload does not hold a backend worker for the whole transfer
+        client_max_body_size 200m;
+        client_body_buffer_size 256k;
+        proxy_request_buffering on;
+
+        # A location-level access_log replaces the inherited one, so keep
+        # API requests in the default access log as well
+        access_log /var/log/nginx/access.log;
+        access_log /var/log/nginx/teqst_timing.log teqst_timing;
+
         proxy_pass http://127.0.0.1:8000;
         proxy_set_header Host \$host;
         proxy_set_header X-Real-IP \$remote_addr;
@@ -208,15 +327,37 @@ server {
         proxy_set_header X-Forwarded-Proto \$scheme;
     }
 
-    # Static files
-    location /static/ {
-        alias /var/www/teqst/static/;
+    # Static files (^~ keeps the bundle regex above from matching here)
+    location ^~ /static/ {
+        root /var/www/teqst;
+        add_header Cache-Control "public, max-age=86400";
+
+        # Hashed names from ManifestStaticFilesStorage
+        location ~* "\.[0-9a-f]{12}\.[a-z0-9]+\$" {
+            add_header Cache-Control "public, max-age=31536000, immutable";
+        }
     }
 
     # Media files
-    location /media/ {
+    location ^~ /media/ {
         alias /var/www/teqst/media/;
     }
+
+    # Recordings are never served publicly; downloads go through Django's
+    # permission checks and are handed to /protected-media/ below
+    location ^~ /media/$RECORDINGS_MEDIA_DIR/ {
+        internal;
+    }
+
+    # Recording audio handed off by Django via X-Accel-Redirect.
+    # nginx answers Range (206) and If-None-Match/If-Modified-Since (304)
+    # requests itself, so seeks and replays never reach the app server.
+    location /protected-media/ {
+        internal;
+        alias /var/www/teqst/media/;
+        etag on;
+        add_header Cache-Control "private, max-age=3600";
+    }
 }
 EOF
     
@@ -247,17 +388,22 @@ setup_pm2() {
 module.exports = {
   apps: [{
     name: '$SERVICE_NAME',
-    script: 'manage.py',
+    script: '$BACKEND_DIR/venv/bin/gunicorn',
     cwd: '$BACKEND_DIR/TEQST',
     interpreter: '$BACKEND_DIR/venv/bin/python',
-    args: 'runserver 127.0.0.1:8000',
+    args: '--config $PROJECT_DIR/gunicorn.conf.py TEQST.wsgi:application',
     env: {
-      DJANGO_SETTINGS_MODULE: 'TEQST.localsettings'
+      DJANGO_SETTINGS_MODULE: 'TEQST.localsettings',
+      TEQST_WORKERS: '$BACKEND_WORKERS',
+      TEQST_THREADS: '$BACKEND_THREADS',
+      TEQST_MAX_REQUESTS: '$BACKEND_MAX_REQUESTS'
     },
     instances: 1,
     autorestart: true,
     watch: false,
+    // Watches the gunicorn master only; workers are recycled via TEQST_MAX_REQUESTS
     max_memory_restart: '1G',
+    kill_timeout: 30000,
     error_file: './logs/err.log',
     out_file: './logs/out.log',
     log_file: './logs/combined.log',
@@ -295,7 +441,14 @@ Type=simple
 User=$USER
 WorkingDirectory=$BACKEND_DIR/TEQST
 Environment=PATH=$BACKEND_DIR/venv/bin
-ExecStart=$BACKEND_DIR/venv/bin/python manage.py runserver 127.0.0.1:8000
+Environment=DJANGO_SETTINGS_MODULE=TEQST.localsettings
+Environment=TEQST_WORKERS=$BACKEND_WORKERS
+Environment=TEQST_THREADS=$BACKEND_THREADS
+Environment=TEQST_MAX_REQUESTS=$BACKEND_MAX_REQUESTS
+ExecStart=$BACKEND_DIR/venv/bin/gunicorn --config $PROJECT_DIR/gunicorn.conf.py TEQST.wsgi:application
+ExecReload=/bin/kill -s HUP \$MAINPID
+KillMode=mixed
+TimeoutStopSec=30
 Restart=always
 RestartSec=10
 
@@ -349,6 +502,7 @@ main() {
     setup_directories
     setup_backend
     setup_frontend
+    compress_static_assets
     setup_nginx
     
     echo "Choose process management:"
@@ -370,6 +524,16 @@ main() {
     echo "🎉 Deployment completed successfully!"
     echo ""
     
+    # Measure the transfer-size reduction as served by nginx
+    print_status "Checking compressed transfer sizes..."
+    if "$BACKEND_DIR/venv/bin/python" "$PROJECT_DIR/compress_static.py" \
+        --manifest "$PROJECT_DIR/static_manifest.json" \
+        --check-url http://116.202.96.11/ "$FRONTEND_DIR/www"; then
+        print_success "Compressed assets are served"
+    else
+        print_warning "nginx is not serving precompressed assets"
+    fi
+    
     # Run deployment tests
     print_status "Running deployment tests..."
     if command -v python3 &> /dev/null; then
@@ -399,7 +563,8 @@ main() {
     echo "- Check PM2 status: pm2 status"
     echo "- Check nginx status: sudo systemctl status nginx"
     echo "- View logs: pm2 logs $SERVICE_NAME"
-    echo "- Restart services: pm2 restart $SERVICE_NAME"
+    echo "- Reload code gracefully: pm2 sendSignal SIGHUP $SERVICE_NAME"
+    echo "- Restart after settings changes: pm2 restart $SERVICE_NAME --update-env"
     echo "- Run deployment tests: python3 deployment_tests.py"
 }
 
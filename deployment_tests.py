@@ -9,6 +9,13 @@ import sys
 import requests
 import json
 import time
+import argparse
+import io
+import math
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
 
 # Configuration
@@ -24,6 +31,55 @@ TEST_USER = {
     "password": "test123"
 }
 
+# Load mode - runs against a local backend with a seeded throwaway database.
+# The speaker password is only ever read from this environment variable.
+LOAD_PASSWORD_ENV = "TEQST_LOAD_PASSWORD"
+LOAD_SPEAKER_PREFIX = "loadspeaker"
+LOAD_CONVERT_PATH = "/api/opus/convert/"
+PRODUCTION_SETTINGS = "TEQST.localsettings"
+
+# Seed script run through manage.py shell; all values come from the environment.
+# Besides the speakers it creates a public shared folder with one text for the
+# texts flow and prints its id on the last line.
+SEED_SCRIPT = """
+import os
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from textmgmt.models import Text
+
+User = get_user_model()
+SharedFolder = Text._meta.get_field('shared_folder').related_model
+Language = Text._meta.get_field('language').related_model
+folder_fields = {field.name for field in SharedFolder._meta.get_fields()}
+prefix = os.environ['TEQST_LOAD_PREFIX']
+
+speakers = []
+for i in range(int(os.environ['TEQST_LOAD_SPEAKERS'])):
+    user, _ = User.objects.get_or_create(username=prefix + str(i))
+    user.set_password(os.environ['TEQST_LOAD_PASSWORD'])
+    user.save()
+    speakers.append(user)
+
+publisher, _ = User.objects.get_or_create(username=prefix + 'publisher')
+folder = SharedFolder.objects.filter(name=prefix, owner=publisher).first()
+if folder is None:
+    extra = {'public': True} if 'public' in folder_fields else {}
+    folder = SharedFolder.objects.create(name=prefix, owner=publisher, **extra)
+if 'speaker' in folder_fields:
+    folder.speaker.add(*speakers)
+
+if not Text.objects.filter(shared_folder=folder).exists():
+    language = Language.objects.first() or Language.objects.create(
+        english_name='English', native_name='English', short='en')
+    text = Text.objects.create(title='Load test text', shared_folder=folder, language=language)
+    content = 'The speaker reads this sentence aloud.\\n\\n' * 20
+    text.textfile.save('load_test.txt', ContentFile(content.encode('utf-8')), save=True)
+    text.create_sentences()
+
+print('TEQST_LOAD_FOLDER=' + str(folder.pk))
+"""
+SEED_FOLDER_MARKER = "TEQST_LOAD_FOLDER="
+
 # Colors for output
 class Colors:
     GREEN = '\033[92m'
@@ -235,6 +291,275 @@ def run_django_tests():
         print_error(f"Failed to run Django tests: {e}")
         return False
 
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def make_test_wav(seconds=2, sample_rate=16000):
+    """Build a short silent mono WAV in memory for upload tests"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b'\x00\x00' * sample_rate * seconds)
+    return buffer.getvalue()
+
+def seed_load_data(django_dir, settings_module, python, count, prefix, password):
+    """Create the load-test speakers and shared folder in a throwaway database
+    
+    Returns the id of the seeded folder, or None if seeding failed.
+    """
+    print_status(f"Seeding {count} load-test speakers ({settings_module})...")
+    
+    if settings_module == PRODUCTION_SETTINGS:
+        print_error(f"Refusing to seed with the production settings {PRODUCTION_SETTINGS}")
+        return None
+    
+    if not os.path.exists(os.path.join(django_dir, "manage.py")):
+        print_error(f"manage.py not found in {django_dir}")
+        return None
+    
+    env = dict(os.environ,
+               DJANGO_SETTINGS_MODULE=settings_module,
+               TEQST_LOAD_SPEAKERS=str(count),
+               TEQST_LOAD_PREFIX=prefix,
+               TEQST_LOAD_PASSWORD=password)
+    
+    try:
+        import subprocess
+        
+        for command in (["migrate", "--noinput"], ["shell", "-c", SEED_SCRIPT]):
+            result = subprocess.run([python, "manage.py", *command],
+                                    capture_output=True, text=True, timeout=300, cwd=django_dir, env=env)
+            if result.returncode != 0:
+                break
+        
+        if result.returncode != 0:
+            print_error(f"Seeding load-test data failed: {result.stderr}")
+            return None
+        
+        folder_ids = [line[len(SEED_FOLDER_MARKER):] for line in result.stdout.splitlines()
+                      if line.startswith(SEED_FOLDER_MARKER)]
+        if not folder_ids:
+            print_error("Seeding did not report the load-test folder")
+            return None
+        
+        print_success(f"Seeded {count} load-test speakers and shared folder {folder_ids[-1]}")
+        return folder_ids[-1]
+    except Exception as e:
+        print_error(f"Failed to seed load-test data: {e}")
+        return None
+
+class LoadRecorder:
+    """Thread-safe collection of per-endpoint latencies"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+    
+    def record(self, endpoint, elapsed, ok):
+        with self.lock:
+            if ok:
+                self.latencies.setdefault(endpoint, []).append(elapsed)
+            else:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+    
+    def summary(self, wall_time):
+        """Per-endpoint count, errors, p50/p95/p99 latency (ms) and throughput"""
+        report = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies.get(endpoint, []))
+            report[endpoint] = {
+                'requests': len(values),
+                'errors': self.errors.get(endpoint, 0),
+                'p50_ms': round(1000 * percentile(values, 50), 2) if values else None,
+                'p95_ms': round(1000 * percentile(values, 95), 2) if values else None,
+                'p99_ms': round(1000 * percentile(values, 99), 2) if values else None,
+                'throughput_rps': round(len(values) / wall_time, 2) if wall_time else None,
+            }
+        return report
+
+def timed_request(recorder, endpoint, session, method, url, **kwargs):
+    """Issue a request on a pooled session and record its latency"""
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=30, **kwargs)
+        ok = response.status_code < 400
+    except requests.exceptions.RequestException:
+        response, ok = None, False
+    recorder.record(endpoint, time.perf_counter() - start, ok)
+    return response if ok else None
+
+def first_folder_id(response):
+    """Folder id of the first entry of a recent-folders or publicfolders response"""
+    if response is None:
+        return None
+    try:
+        entry = response.json()[0]
+        return entry.get('folder', entry)['id']
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        # Empty list, paginated dict or a non-JSON error page
+        return None
+
+def run_speaker(recorder, base_url, username, password, iterations, convert_path, audio, folder_id=None):
+    """Log in one speaker and drive the speaker flows on a pooled session"""
+    session = requests.Session()
+    session.mount(base_url, HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    
+    response = timed_request(recorder, 'login', session, 'POST', f"{base_url}/api/auth/login/",
+                             json={"username": username, "password": password})
+    if response is None:
+        return False
+    session.headers['Authorization'] = f"Token {response.json()['token']}"
+    
+    for _ in range(iterations):
+        recent = timed_request(recorder, 'recent-folders', session, 'GET',
+                               f"{base_url}/api/spk/recent-folders/")
+        public = timed_request(recorder, 'publicfolders', session, 'GET',
+                               f"{base_url}/api/spk/publicfolders/")
+        
+        # Fresh speakers have no recent folders yet, so fall back to a public one
+        target = folder_id or first_folder_id(recent) or first_folder_id(public)
+        if target is not None:
+            timed_request(recorder, 'sharedfolder-texts', session, 'GET',
+                          f"{base_url}/api/spk/sharedfolders/{target}/texts/")
+        
+        if convert_path:
+            timed_request(recorder, 'opus-convert', session, 'POST', f"{base_url}{convert_path}",
+                          files={'audio_file': ('recording.wav', audio, 'audio/wav')},
+                          data={'quality': 'medium'})
+    return True
+
+def check_latency_budget(report, expected, baseline, max_p95_ms, max_regression, max_error_rate):
+    """Return the list of endpoints that are missing, failing or over budget"""
+    failures = [f"{endpoint}: no samples recorded" for endpoint in expected if endpoint not in report]
+    for endpoint, stats in report.items():
+        total = stats['requests'] + stats['errors']
+        if total and stats['errors'] / total > max_error_rate:
+            failures.append(f"{endpoint}: error rate {stats['errors']}/{total} exceeds {max_error_rate:.0%}")
+        p95 = stats['p95_ms']
+        if p95 is None:
+            failures.append(f"{endpoint}: no successful requests")
+            continue
+        if max_p95_ms is not None and p95 > max_p95_ms:
+            failures.append(f"{endpoint}: p95 {p95} ms exceeds {max_p95_ms} ms")
+        reference = (baseline or {}).get(endpoint, {}).get('p95_ms')
+        if reference and p95 > reference * (1 + max_regression):
+            failures.append(f"{endpoint}: p95 {p95} ms regressed from baseline {reference} ms")
+    return failures
+
+def run_load_test(args):
+    """Drive the speaker endpoints concurrently and report latency per endpoint"""
+    print(f"{Colors.BOLD}🚀 TEQST Deployment Load Test{Colors.ENDC}")
+    print("=" * 50)
+    
+    if not args.base_url:
+        print_error("--base-url is required in load mode (point it at a local backend)")
+        return 1
+    if args.base_url.startswith(BASE_URL) or "116.202.96.11" in args.base_url:
+        print_error("Refusing to load test the live server")
+        return 1
+    
+    password = os.environ.get(LOAD_PASSWORD_ENV)
+    if not password:
+        print_error(f"Set {LOAD_PASSWORD_ENV} to the load-test speaker password")
+        return 1
+    
+    folder_id = args.folder_id
+    if args.seed:
+        if not (args.django_dir and args.settings):
+            print_error("--seed requires --django-dir and --settings for a throwaway database")
+            return 1
+        seeded_folder_id = seed_load_data(args.django_dir, args.settings, args.django_python,
+                                          args.speakers, args.prefix, password)
+        if seeded_folder_id is None:
+            return 1
+        folder_id = folder_id or seeded_folder_id
+    
+    recorder = LoadRecorder()
+    audio = make_test_wav()
+    usernames = [f"{args.prefix}{i}" for i in range(args.speakers)]
+    
+    print_status(f"Driving {args.speakers} speakers x {args.iterations} iterations against {args.base_url}...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.speakers) as executor:
+        logged_in = list(executor.map(
+            lambda username: run_speaker(recorder, args.base_url, username, password,
+                                         args.iterations, args.convert_path, audio, folder_id),
+            usernames))
+    wall_time = time.perf_counter() - start
+    
+    if not any(logged_in):
+        print_error("No speaker could log in (use --seed to create them)")
+        return 1
+    
+    report = recorder.summary(wall_time)
+    
+    print("\n" + "=" * 50)
+    print(f"{Colors.BOLD}Load Test Summary:{Colors.ENDC} {sum(logged_in)}/{len(usernames)} speakers, {wall_time:.1f}s")
+    print(f"{'endpoint':<20}{'reqs':>7}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for endpoint, stats in report.items():
+        print(f"{endpoint:<20}{stats['requests']:>7}{stats['errors']:>6}"
+              f"{str(stats['p50_ms']):>10}{str(stats['p95_ms']):>10}{str(stats['p99_ms']):>10}"
+              f"{str(stats['throughput_rps']):>9}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print_status(f"Results written to {args.output}")
+    
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    
+    expected = ['login', 'recent-folders', 'publicfolders', 'sharedfolder-texts']
+    if args.convert_path:
+        expected.append('opus-convert')
+    
+    failures = check_latency_budget(report, expected, baseline, args.max_p95_ms,
+                                    args.max_regression, args.max_error_rate)
+    if failures:
+        for failure in failures:
+            print_error(failure)
+        print_error("❌ Latency budget exceeded. Please check the deployment.")
+        return 1
+    
+    print_success("🎉 Load test within latency budget.")
+    return 0
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="TEQST deployment tests")
+    parser.add_argument('--load', action='store_true',
+                        help="Run the concurrent load test instead of the smoke tests")
+    parser.add_argument('--base-url', help="Local backend to load test, e.g. http://127.0.0.1:8001")
+    parser.add_argument('--speakers', type=int, default=10, help="Number of synthetic speakers")
+    parser.add_argument('--iterations', type=int, default=20, help="Flow iterations per speaker")
+    parser.add_argument('--prefix', default=LOAD_SPEAKER_PREFIX, help="Synthetic speaker username prefix")
+    parser.add_argument('--seed', action='store_true',
+                        help="Migrate the throwaway database and create the synthetic speakers and folder before the run")
+    parser.add_argument('--django-dir', help="Directory containing manage.py (required with --seed)")
+    parser.add_argument('--settings', help="Settings module of the throwaway database (required with --seed)")
+    parser.add_argument('--django-python', default=sys.executable,
+                        help="Python interpreter of the backend virtual environment")
+    parser.add_argument('--folder-id', help="Shared folder to use for the texts flow (default: the seeded one)")
+    parser.add_argument('--convert-path', default=LOAD_CONVERT_PATH,
+                        help="Opus conversion endpoint to post a WAV to (empty string to skip)")
+    parser.add_argument('--output', help="Write the per-endpoint report as JSON")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare p95 latencies against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Allowed p95 increase over the baseline (fraction, default 0.2)")
+    parser.add_argument('--max-p95-ms', type=float, help="Absolute p95 latency budget per endpoint")
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help="Allowed fraction of failed requests per endpoint (default 0.01)")
+    return parser.parse_args()
+
 def main():
     """Main test function"""
     print(f"{Colors.BOLD}🚀 TEQST Deployment Test Suite{Colors.ENDC}")
@@ -302,5 +627,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    exit_code = main()
+    args = parse_args()
+    exit_code = run_load_test(args) if args.load else main()
     sys.exit(exit_code)
@@ -1,17 +1,22 @@
 module.exports = {
   apps: [{
     name: 'teqst-backend',
-    script: 'manage.py',
+    script: '/opt/teqst/TEQST_Backend/venv/bin/gunicorn',
     cwd: '/opt/teqst/TEQST_Backend/TEQST',
     interpreter: '/opt/teqst/TEQST_Backend/venv/bin/python',
-    args: 'runserver 127.0.0.1:8000',
+    args: '--config /opt/teqst/gunicorn.conf.py TEQST.wsgi:application',
     env: {
-      DJANGO_SETTINGS_MODULE: 'TEQST.localsettings'
+      DJANGO_SETTINGS_MODULE: 'TEQST.localsettings',
+      TEQST_WORKERS: '4',
+      TEQST_THREADS: '4',
+      TEQST_MAX_REQUESTS: '1000'
     },
     instances: 1,
     autorestart: true,
     watch: false,
+    // Watches the gunicorn master only; workers are recycled via TEQST_MAX_REQUESTS
     max_memory_restart: '1G',
+    kill_timeout: 30000,
     error_file: './logs/err.log',
     out_file: './logs/out.log',
     log_file: './logs/combined.log',
@@ -0,0 +1,49 @@
+"""
+Gunicorn configuration for the TEQST backend
+Used by the PM2 and systemd services that deploy.sh sets up.
+
+Every setting can be overridden through an environment variable so the
+process model can be tuned per server without editing this file.
+"""
+
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# Socket - nginx proxies /api/ and /admin/ to this address
+bind = os.environ.get("TEQST_BIND", "127.0.0.1:8000")
+
+# Process model: worker processes, each serving requests from a thread pool,
+# so one slow upload no longer blocks every other speaker
+workers = _env_int("TEQST_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+threads = _env_int("TEQST_THREADS", 4)
+worker_class = "gthread"
+
+# Import Django in each worker after forking, so SIGHUP starts workers on
+# the current code while the old ones finish their requests. Preloading in
+# the master saves memory but pins the code until a full restart; changed
+# TEQST_* environment variables always need a full restart.
+preload_app = os.environ.get("TEQST_PRELOAD", "0") == "1"
+
+# Recycle workers periodically to keep memory in check; the jitter
+# prevents all workers from restarting at the same time
+max_requests = _env_int("TEQST_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("TEQST_MAX_REQUESTS_JITTER", 100)
+
+# Long recordings and Opus conversions can take a while
+timeout = _env_int("TEQST_TIMEOUT", 120)
+graceful_timeout = _env_int("TEQST_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("TEQST_KEEPALIVE", 5)
+
+# Logging goes to stdout/stderr so PM2 and journald pick it up
+accesslog = "-"
+errorlog = "-"
+# Combined log format plus the request duration in seconds
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(L)s'
+loglevel = os.environ.get("TEQST_LOG_LEVEL", "info")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Latency Report for TEQST
+Turns the nginx timing log written by the teqst_timing log format into
+per-endpoint latency histograms, either as a readable table or in the
+Prometheus text exposition format (for node_exporter's textfile collector).
+
+Usage:
+    python3 latency_report.py
+    python3 latency_report.py --prometheus --output /var/lib/node_exporter/teqst.prom
+"""
+
+import argparse
+import os
+import re
+import sys
+
+from deployment_tests import Colors, percentile, print_error
+
+TIMING_LOG = "/var/log/nginx/teqst_timing.log"
+
+# Histogram buckets in seconds, matching the Prometheus client defaults
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+LINE_RE = re.compile(r'"(?P<method>[A-Z]+) (?P<path>\S+) [^"]*" (?P<status>\d{3}) \d+ rt=(?P<rt>[\d.]+)')
+
+# Numeric ids and UUIDs become {id}
+ID_RE = re.compile(r'\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+# Fixed path segments of the TEQST API routes. Any other segment (usernames,
+# slugs, file names) becomes {param} so every view gets a single series.
+ROUTE_SEGMENTS = {
+    'auth', 'login', 'logout', 'users', 'me', 'languages', 'countries',
+    'spk', 'pub', 'lstn', 'folders', 'sharedfolders', 'publicfolders', 'recent-folders',
+    'texts', 'textrecordings', 'sentencerecordings', 'recordings', 'speakers', 'listeners', 'stats',
+    'download', 'upload', 'opus', 'convert', 'batch-convert', 'info', 'analyze',
+}
+MAX_SEGMENTS = 6
+
+# 404s and unexpected paths share one series to keep label cardinality bounded
+OTHER_PATH = "other"
+
+
+def normalize_segment(segment):
+    """Keep known route segments, replace ids with {id} and anything else with {param}"""
+    if segment in ROUTE_SEGMENTS:
+        return segment
+    return '{id}' if ID_RE.fullmatch(segment) else '{param}'
+
+
+def normalize_path(path, status):
+    """Map a request path to its route template; 404s and non-API paths become other"""
+    path = path.split('?', 1)[0]
+    if status == '404' or not path.startswith('/api/'):
+        return OTHER_PATH
+    segments = [segment for segment in path[len('/api/'):].split('/') if segment]
+    if len(segments) > MAX_SEGMENTS:
+        return OTHER_PATH
+    if not segments:
+        return '/api/'
+    trailing = '/' if path.endswith('/') else ''
+    return '/api/' + '/'.join(normalize_segment(segment) for segment in segments) + trailing
+
+
+def escape_label(value):
+    """Escape a Prometheus label value (backslash, double quote and newline)"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def parse_log(path):
+    """Group request durations by (method, normalized path)"""
+    durations = {}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = LINE_RE.search(line)
+            if not match:
+                continue
+            key = (match['method'], normalize_path(match['path'], match['status']))
+            durations.setdefault(key, []).append(float(match['rt']))
+    return durations
+
+
+def render_prometheus(durations):
+    """Render cumulative histograms in the Prometheus text format"""
+    lines = [
+        "# HELP teqst_request_duration_seconds Request duration seen by nginx for /api/ requests",
+        "# TYPE teqst_request_duration_seconds histogram",
+    ]
+    for (method, path), values in sorted(durations.items()):
+        labels = f'method="{escape_label(method)}",path="{escape_label(path)}"'
+        for bucket in BUCKETS:
+            count = sum(1 for value in values if value <= bucket)
+            lines.append(f'teqst_request_duration_seconds_bucket{{{labels},le="{bucket}"}} {count}')
+        lines.append(f'teqst_request_duration_seconds_bucket{{{labels},le="+Inf"}} {len(values)}')
+        lines.append(f'teqst_request_duration_seconds_sum{{{labels}}} {sum(values):.3f}')
+        lines.append(f'teqst_request_duration_seconds_count{{{labels}}} {len(values)}')
+    return "\n".join(lines) + "\n"
+
+
+def render_table(durations, color=True):
+    """Render a p50/p95/p99 table, slowest endpoints first"""
+    rows = []
+    for (method, path), values in durations.items():
+        values.sort()
+        rows.append((percentile(values, 95), method, path, len(values),
+                     percentile(values, 50), percentile(values, 99)))
+    rows.sort(reverse=True)
+
+    header = f"{'method':<7}{'endpoint':<50}{'reqs':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    lines = [f"{Colors.BOLD}{header}{Colors.ENDC}" if color else header]
+    for p95, method, path, count, p50, p99 in rows:
+        lines.append(f"{method:<7}{path:<50}{count:>8}{1000 * p50:>10.1f}{1000 * p95:>10.1f}{1000 * p99:>10.1f}")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-endpoint latency report from the nginx timing log")
+    parser.add_argument('--log', default=TIMING_LOG)
+    parser.add_argument('--prometheus', action='store_true', help="Emit Prometheus text format")
+    parser.add_argument('--output', help="Write to this file (atomically) instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        durations = parse_log(args.log)
+    except OSError as e:
+        print_error(f"Cannot read timing log: {e}")
+        return 1
+
+    if args.prometheus:
+        report = render_prometheus(durations)
+    else:
+        # Only colour the table when it goes straight to a terminal
+        report = render_table(durations, color=not args.output and sys.stdout.isatty())
+
+    if args.output:
+        # Write next to the target and rename so scrapers never see a partial file
+        tmp_path = f"{args.output}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(report)
+        os.replace(tmp_path, args.output)
+    else:
+        sys.stdout.write(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
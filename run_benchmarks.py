@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Backend Micro-Benchmarks for TEQST
+Times the backend hot paths (text ingestion and Opus processing) against
+synthetic fixtures and a throwaway SQLite database, records timing and
+peak memory as JSON and compares the run against a stored baseline.
+
+Usage:
+    python3 run_benchmarks.py --output baseline.json
+    python3 run_benchmarks.py --baseline baseline.json
+    TEQST_BENCH_LIVE_DB=1 python3 run_benchmarks.py --only connection
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from array import array
+
+sys.path.append('/opt/teqst/TEQST_Backend/TEQST')
+
+# Set up Django environment on a throwaway database and media root
+# (WORK_DIR is removed when the run finishes)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TEQST.settings')
+WORK_DIR = tempfile.mkdtemp(prefix='teqst_bench_')
+
+# TEQST_BENCH_LIVE_DB keeps the configured database so the connection
+# benchmarks measure the production connection settings (read-only queries)
+LIVE_DB = os.environ.get('TEQST_BENCH_LIVE_DB') == '1'
+
+from django.conf import settings
+if not LIVE_DB:
+    settings.DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(WORK_DIR, 'bench.sqlite3'),
+        }
+    }
+settings.MEDIA_ROOT = os.path.join(WORK_DIR, 'media')
+
+import django
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+
+from textmgmt.models import SharedFolder, Text
+from usermgmt.models import Language
+from recordingmgmt.opus_utils import OPUS_PRESETS, create_opus_processor
+
+ARABIC_SENTENCE = "قُلْ هُوَ اللَّهُ أَحَدٌ، اللَّهُ الصَّمَدُ، لَمْ يَلِدْ وَلَمْ يُولَدْ، وَلَمْ يَكُن لَّهُ كُفُوًا أَحَدٌ."
+LATIN_SENTENCE = "The quick brown fox jumps over the lazy dog while the speaker reads the next sentence aloud."
+
+TEXT_SIZES_KB = [10, 1024, 5120]
+WAV_SECONDS = [2, 30, 300]
+
+
+class BenchmarkError(Exception):
+    """Raised when a benchmarked call fails, so no bogus timings are recorded"""
+
+
+def measure(func, repeats):
+    """Time func over `repeats` untraced runs, then take peak memory in one traced run
+
+    peak_kb is the Python heap of this process only; memory used by
+    subprocesses (e.g. ffmpeg spawned by pydub in convert_to_opus) is not
+    included.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # Tracing slows the call down several times, so it is kept out of the timings
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median_s': round(statistics.median(timings), 6),
+        'min_s': round(min(timings), 6),
+        'peak_kb': round(peak / 1024, 1),
+        'repeats': repeats,
+    }
+
+
+def create_fixture(model, **values):
+    """Create a model instance, failing with the model's real fields if a name does not exist"""
+    fields = {field.name for field in model._meta.get_fields()}
+    unknown = sorted(set(values) - fields)
+    if unknown:
+        raise BenchmarkError(f"{model.__name__} has no field(s) {', '.join(unknown)}; "
+                             f"available: {', '.join(sorted(fields))}")
+    return model.objects.create(**values)
+
+
+def create_fixtures():
+    """Create the publisher, shared folder and language the benchmark texts belong to"""
+    publisher = get_user_model().objects.create_user(username='benchmark_publisher',
+                                                     password='benchmark')
+    shared_folder = create_fixture(SharedFolder, name='benchmark', owner=publisher)
+    language = create_fixture(Language, english_name='Arabic', native_name='العربية',
+                              short='ar', right_to_left=True)
+    return shared_folder, language
+
+
+def write_text_fixture(path, sentence, size_kb):
+    """Write a blank-line separated text of roughly size_kb kilobytes"""
+    block = (sentence + "\n\n").encode('utf-8')
+    with open(path, 'wb') as f:
+        for _ in range(max(1, size_kb * 1024 // len(block))):
+            f.write(block)
+
+
+def write_wav_fixture(path, seconds, sample_rate=16000):
+    """Write a speech-like mono 16-bit WAV: a modulated tone plus noise"""
+    rng = random.Random(seconds)
+    samples = array('h', (
+        int(8000 * math.sin(2 * math.pi * 220 * n / sample_rate) * (0.5 + 0.5 * math.sin(2 * math.pi * 3 * n / sample_rate))
+            + rng.uniform(-300, 300))
+        for n in range(seconds * sample_rate)
+    ))
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+
+
+def bench_text_ingestion(repeats):
+    """Benchmark create_sentences() and get_content() on large Arabic/Latin texts"""
+    results = {}
+    shared_folder, language = create_fixtures()
+
+    for script, sentence in (('arabic', ARABIC_SENTENCE), ('latin', LATIN_SENTENCE)):
+        for size_kb in TEXT_SIZES_KB:
+            path = os.path.join(WORK_DIR, f'{script}_{size_kb}kb.txt')
+            write_text_fixture(path, sentence, size_kb)
+
+            text = Text.objects.create(title=f"bench {script} {size_kb}kb",
+                                       shared_folder=shared_folder, language=language)
+            with open(path, 'rb') as f:
+                text.textfile.save(os.path.basename(path), File(f), save=True)
+
+            print(f"📖 {script} text, {size_kb} KB")
+            results[f'create_sentences[{script},{size_kb}kb]'] = measure(text.create_sentences, repeats)
+            results[f'get_content[{script},{size_kb}kb]'] = measure(text.get_content, repeats)
+    return results
+
+
+def bench_opus(repeats):
+    """Benchmark convert_to_opus() per preset and get_audio_quality_metrics()"""
+    results = {}
+    for seconds in WAV_SECONDS:
+        wav_path = os.path.join(WORK_DIR, f'speech_{seconds}s.wav')
+        write_wav_fixture(wav_path, seconds)
+        print(f"🎙️ {seconds}s WAV")
+
+        for preset in OPUS_PRESETS:
+            processor = create_opus_processor(preset)
+            opus_path = os.path.join(WORK_DIR, f'speech_{seconds}s_{preset}.opus')
+
+            def convert():
+                if not processor.convert_to_opus(wav_path, opus_path, preset):
+                    raise BenchmarkError(f"convert_to_opus failed for {preset} preset (is ffmpeg/opuslib installed?)")
+
+            results[f'convert_to_opus[{preset},{seconds}s]'] = measure(convert, repeats)
+
+        processor = create_opus_processor('medium')
+
+        def analyze():
+            metrics = processor.get_audio_quality_metrics(wav_path)
+            if not metrics or 'error' in metrics or 'quality_score' not in metrics:
+                raise BenchmarkError(f"get_audio_quality_metrics failed: {metrics}")
+
+        results[f'get_audio_quality_metrics[{seconds}s]'] = measure(analyze, repeats)
+    return results
+
+
+def bench_connection(repeats, cycles=200):
+    """Benchmark per-request database connection overhead
+
+    request_cycle mimics Django's request_started/request_finished handling,
+    so it reconnects with CONN_MAX_AGE = 0, reuses the connection when it is
+    persistent and borrows from the pool in pool mode. reconnect opens a
+    connection straight through the database driver every time, bypassing
+    Django and any pool, as the reference for the connect cost.
+    """
+    def request_cycle():
+        for _ in range(cycles):
+            close_old_connections()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            close_old_connections()
+
+    def reconnect():
+        params = connection.get_connection_params()
+        for _ in range(cycles):
+            # get_new_connection() borrows from the pool when OPTIONS['pool'] is set
+            raw = connection.Database.connect(**params)
+            try:
+                cursor = raw.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            finally:
+                raw.close()
+
+    db = settings.DATABASES['default']
+    print(f"🔌 {db['ENGINE']} CONN_MAX_AGE={db.get('CONN_MAX_AGE', 0)} pool={bool(db.get('OPTIONS', {}).get('pool'))}")
+    results = {
+        f'request_cycle[x{cycles}]': measure(request_cycle, repeats),
+        f'reconnect[x{cycles}]': measure(reconnect, repeats),
+    }
+    connection.close()
+    return results
+
+
+def compare_to_baseline(results, baseline, max_regression):
+    """Print the change per benchmark and return the names that regressed"""
+    regressions = []
+    print("\n📊 Comparison with baseline:")
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            print(f"   {name}: new")
+            continue
+        ratio = result['median_s'] / reference['median_s'] if reference['median_s'] else float('inf')
+        marker = "❌" if ratio > 1 + max_regression else "✅"
+        print(f"   {marker} {name}: {reference['median_s']:.4f}s -> {result['median_s']:.4f}s ({ratio:.2f}x)")
+        if ratio > 1 + max_regression:
+            regressions.append(name)
+    return regressions
+
+
+def run_benchmarks():
+    """Run the benchmark suite"""
+    parser = argparse.ArgumentParser(description="TEQST backend micro-benchmarks")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--only', choices=['text', 'opus', 'connection'], help="Run only one group of benchmarks")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the results")
+    parser.add_argument('--baseline', help="Earlier results to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Allowed slowdown over the baseline median (fraction, default 0.2)")
+    args = parser.parse_args()
+
+    print("⏱️ Running TEQST Backend Benchmarks")
+    print("=" * 40)
+    print(f"Working directory: {WORK_DIR}")
+    if LIVE_DB and args.only != 'connection':
+        print("❌ TEQST_BENCH_LIVE_DB only supports --only connection")
+        return False
+    if not LIVE_DB:
+        call_command('migrate', verbosity=0, interactive=False)
+
+    results = {}
+    try:
+        if args.only in (None, 'text'):
+            results.update(bench_text_ingestion(args.repeats))
+        if args.only in (None, 'opus'):
+            results.update(bench_opus(args.repeats))
+        if args.only in (None, 'connection'):
+            results.update(bench_connection(args.repeats))
+    except BenchmarkError as e:
+        print(f"\n❌ Benchmark aborted: {e}")
+        return False
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare_to_baseline(results, baseline, args.max_regression):
+            print("\n❌ Benchmarks regressed against the baseline")
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        success = run_benchmarks()
+    finally:
+        connection.close()
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Serving Benchmark for TEQST
+Measures requests/sec on /api/spk/recent-folders/ so the runserver and
+gunicorn process models can be compared on the same machine.
+
+Usage:
+    python3 serving_benchmark.py --output before.json          # runserver
+    python3 serving_benchmark.py --baseline before.json        # gunicorn
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+import requests
+
+from deployment_tests import TEST_USER, percentile, print_error, print_status, print_success, print_warning
+
+
+def login(base_url, username, password):
+    """Log in and return an auth token"""
+    response = requests.post(f"{base_url}/api/auth/login/",
+                             json={"username": username, "password": password}, timeout=10)
+    response.raise_for_status()
+    return response.json()['token']
+
+
+def run_benchmark(base_url, token, concurrency, duration):
+    """Hit recent-folders from `concurrency` threads for `duration` seconds"""
+    url = f"{base_url}/api/spk/recent-folders/"
+    deadline = time.monotonic() + duration
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def worker():
+        session = requests.Session()
+        session.headers['Authorization'] = f'Token {token}'
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=30).status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'duration': round(wall, 2),
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_sec': round(len(latencies) / wall, 2),
+        'mean_ms': round(1000 * sum(latencies) / len(latencies), 2) if latencies else None,
+        'p95_ms': round(1000 * percentile(latencies, 95), 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/spk/recent-folders/ throughput")
+    parser.add_argument('--base-url', default="http://127.0.0.1:8000")
+    parser.add_argument('--username', default=TEST_USER['username'])
+    parser.add_argument('--password', default=TEST_USER['password'])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--output', help="Write the result as JSON to this file")
+    parser.add_argument('--baseline', help="JSON result of an earlier run to compare against")
+    args = parser.parse_args()
+
+    try:
+        token = login(args.base_url, args.username, args.password)
+    except requests.exceptions.RequestException as e:
+        print_error(f"Login failed: {e}")
+        return 1
+
+    print_status(f"Running {args.concurrency} clients for {args.duration}s against {args.base_url}...")
+    result = run_benchmark(args.base_url, token, args.concurrency, args.duration)
+    print_success(f"{result['requests_per_sec']} requests/sec "
+                  f"(mean {result['mean_ms']} ms, p95 {result['p95_ms']} ms, {result['errors']} errors)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['requests_per_sec']:
+            change = result['requests_per_sec'] / baseline['requests_per_sec']
+            print_status(f"Baseline: {baseline['requests_per_sec']} requests/sec -> {change:.2f}x")
+        else:
+            print_warning("Baseline has no successful requests")
+
+    return 0 if result['requests'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
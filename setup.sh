@@ -97,6 +97,7 @@ setup_backend() {
     # Install dependencies
     print_status "Installing Python dependencies..."
     pip install -r requirements.txt
+    pip install gunicorn
     print_success "Dependencies installed"
     
     # Navigate to Django project
@@ -231,6 +232,8 @@ main() {
     echo "   source ../venv/bin/activate"
     echo "   python manage.py runserver"
     echo ""
+    echo "   (production servers run gunicorn via deploy.sh, see gunicorn.conf.py)"
+    echo ""
     echo "2. Start the frontend:"
     echo "   cd TEQST_Frontend"
     echo "   ionic serve"